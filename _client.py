@@ -0,0 +1,35 @@
+"""
+Shared Gemini client for the demo scripts
+Every script gets the same genai.Client, so they share one connection pool and one set of credentials
+"""
+
+import functools
+import os
+
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+from httpx import AsyncHTTPTransport
+
+
+@functools.lru_cache(maxsize=1)
+def get_client() -> genai.Client:
+    """
+    Returns the process-wide Gemini client, creating it on first use.
+    The .env file is read at that point rather than when this module is imported.
+    Async calls go through an HTTP/2 httpx transport so concurrent requests share connections.
+    """
+    # Load environment variables from .env file (only once, since the result is cached)
+    load_dotenv()
+
+    # Configure the API key from environment variable
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found. Please set it in .env file.")
+
+    return genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(
+            async_client_args={"transport": AsyncHTTPTransport(retries=1, http2=True)}
+        ),
+    )
@@ -4,20 +4,39 @@ A simple demonstration of how to use function calling with Google Gemini API
 Based on official documentation: https://ai.google.dev/gemini-api/docs/function-calling
 """
 
-from google import genai
 from google.genai import types
+import argparse
+import asyncio
+import io
 import json
-import os
-from dotenv import load_dotenv
+import logging
+from _client import get_client
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Configure the API key from environment variable
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("GEMINI_API_KEY not found. Please set it in .env file.")
-client = genai.Client(api_key=API_KEY)
+# One shared client for all demo calls (see _client.py)
+client = get_client()
+
+
+# Temperature unit names (lowercase) mapped to their symbols; unknown units fall back to Celsius
+UNIT_SYMBOLS = {"celsius": "C", "c": "C", "fahrenheit": "F", "f": "F"}
+
+
+# Simulated weather data for different locations
+WEATHER_DATABASE = {
+    "New York": {"temperature": 22, "condition": "Sunny", "humidity": 60},
+    "London": {"temperature": 15, "condition": "Cloudy", "humidity": 75},
+    "Tokyo": {"temperature": 28, "condition": "Rainy", "humidity": 80},
+    "Paris": {"temperature": 18, "condition": "Partly Cloudy", "humidity": 65},
+}
+DEFAULT_WEATHER = {"temperature": 20, "condition": "Unknown", "humidity": 50}
+
+# Fahrenheit copies computed once at import, so lookups need no conversion
+WEATHER_DATABASE_F = {
+    city: {**weather, "temperature": round(weather["temperature"] * 9/5 + 32, 1)}
+    for city, weather in WEATHER_DATABASE.items()
+}
+DEFAULT_WEATHER_F = {**DEFAULT_WEATHER, "temperature": round(DEFAULT_WEATHER["temperature"] * 9/5 + 32, 1)}
 
 
 # Step 1: Define a dummy weather function
@@ -26,28 +45,19 @@ def get_weather(location: str, unit: str = "celsius") -> dict:
     Dummy function that simulates getting weather data.
     In a real application, this would call an actual weather API.
     """
-    # Simulate weather data for different locations
-    weather_data = {
-        "New York": {"temperature": 22, "condition": "Sunny", "humidity": 60},
-        "London": {"temperature": 15, "condition": "Cloudy", "humidity": 75},
-        "Tokyo": {"temperature": 28, "condition": "Rainy", "humidity": 80},
-        "Paris": {"temperature": 18, "condition": "Partly Cloudy", "humidity": 65},
-    }
-
-    # Get weather for the location, or return default
-    weather = weather_data.get(location, {"temperature": 20, "condition": "Unknown", "humidity": 50})
+    logger.debug("tool=%s location=%s unit=%s", "get_weather", location, unit)
 
-    # Convert to Fahrenheit if requested
-    if unit.lower() == "fahrenheit":
-        weather["temperature"] = round(weather["temperature"] * 9/5 + 32, 1)
-        weather["unit"] = "F"
+    # Get weather for the location in the requested unit, or return default
+    unit_symbol = UNIT_SYMBOLS.get(unit.casefold(), "C")
+    if unit_symbol == "F":
+        weather = WEATHER_DATABASE_F.get(location, DEFAULT_WEATHER_F)
     else:
-        weather["unit"] = "C"
+        weather = WEATHER_DATABASE.get(location, DEFAULT_WEATHER)
 
     return {
         "location": location,
         "temperature": weather["temperature"],
-        "unit": weather["unit"],
+        "unit": unit_symbol,
         "condition": weather["condition"],
         "humidity": weather["humidity"]
     }
@@ -78,19 +88,31 @@ get_weather_declaration = {
 # Step 3: Create tools with function declarations
 weather_tool = types.Tool(function_declarations=[get_weather_declaration])
 
+# Build the request config once and reuse it for every generate_content call
+weather_config = types.GenerateContentConfig(tools=[weather_tool])
 
-def demo_function_calling(user_query: str):
+# Map declared function names to their Python implementations for manual execution
+available_functions = {
+    "get_weather": get_weather,
+}
+
+
+async def execute_function_call(name: str, args: dict):
     """
-    Demonstrates the complete function calling flow following official documentation.
-    Supports parallel function calling (multiple functions called at once).
+    Runs one function call requested by Gemini off the event loop.
+    Returns None for functions this demo does not implement.
     """
-    print(f"\n{'='*60}")
-    print(f"User Query: {user_query}")
-    print(f"{'='*60}\n")
+    function = available_functions.get(name)
+    if function is None:
+        return None
+    return await asyncio.to_thread(function, **args)
 
-    # Step 4: Send the initial request to Gemini with tools
-    config = types.GenerateContentConfig(tools=[weather_tool])
 
+async def send_initial_request(user_query: str):
+    """
+    Sends the user query to Gemini with tools.
+    Returns the conversation contents together with the model's response.
+    """
     contents = [
         types.Content(
             role="user",
@@ -98,11 +120,31 @@ def demo_function_calling(user_query: str):
         )
     ]
 
-    response = client.models.generate_content(
+    response = await client.aio.models.generate_content(
         model="gemini-2.5-flash",
         contents=contents,
-        config=config
+        config=weather_config
     )
+    return contents, response
+
+
+async def demo_function_calling(
+    user_query: str,
+    initial_request: tuple[list[types.Content], types.GenerateContentResponse] | None = None
+):
+    """
+    Demonstrates the complete function calling flow following official documentation.
+    Supports parallel function calling (multiple functions called at once).
+    Pass the result of send_initial_request() as initial_request if it was already sent.
+    """
+    print(f"\n{'='*60}")
+    print(f"User Query: {user_query}")
+    print(f"{'='*60}\n")
+
+    # Step 4: Send the initial request to Gemini with tools (unless the caller already did)
+    if initial_request is None:
+        initial_request = await send_initial_request(user_query)
+    contents, response = initial_request
 
     # Step 5: Check ALL parts for function calls (supports parallel calling)
     function_calls = [
@@ -114,15 +156,24 @@ def demo_function_calling(user_query: str):
     if function_calls:
         print(f"Gemini wants to call {len(function_calls)} function(s):\n")
 
-        # Step 6: Execute ALL function calls and collect results
+        # Step 6: Execute ALL function calls concurrently and collect results in order
+        # Convert each call's args to a dict once and reuse it for printing and execution
+        function_args = [dict(function_call.args) for function_call in function_calls]
+        weather_results = await asyncio.gather(
+            *(
+                execute_function_call(function_call.name, args)
+                for function_call, args in zip(function_calls, function_args)
+            )
+        )
+
         function_response_parts = []
-        for i, function_call in enumerate(function_calls, 1):
+        for i, (function_call, args, weather_result) in enumerate(
+            zip(function_calls, function_args, weather_results), 1
+        ):
             print(f"  [{i}] Function: {function_call.name}")
-            print(f"      Arguments: {dict(function_call.args)}")
+            print(f"      Arguments: {args}")
 
-            if function_call.name == "get_weather":
-                args = dict(function_call.args)
-                weather_result = get_weather(**args)
+            if weather_result is not None:
                 print(f"      Result: {json.dumps(weather_result)}\n")
 
                 # Step 7: Create function response part for each call
@@ -137,52 +188,165 @@ def demo_function_calling(user_query: str):
         contents.append(response.candidates[0].content)  # Model's response with function calls
         contents.append(types.Content(role="user", parts=function_response_parts))  # All function results
 
-        print(f"[DEBUG] Contents before final request (第二次请求前的内容):")
-        print(f"Length of contents: {len(contents)}")
-        for idx, content in enumerate(contents):
-            print(f"\n  [{idx}] Role: {content.role}")
-            print(f"       Number of Parts: {len(content.parts)}")
-            for part_idx, part in enumerate(content.parts):
-                print(f"         Part[{part_idx}]: {type(part).__name__}")
-                if hasattr(part, 'text') and part.text:
-                    text_preview = part.text[:100] + "..." if len(part.text) > 100 else part.text
-                    print(f"                Text: {text_preview}")
-                if hasattr(part, 'function_call') and part.function_call:
-                    print(f"                Function Call: {part.function_call.name}({dict(part.function_call.args)})")
-                if hasattr(part, 'function_response') and part.function_response:
-                    print(f"                Function Response: {part.function_response}")
-        print()
-
-        # Step 9: Send all function results back to get final response
-        final_response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=contents,
-            config=config
-        )
+        # Contents before final request (第二次请求前的内容), shown with --debug
+        logger.debug("contents=%s", contents)
 
+        # Step 9: Send all function results back and stream the final response as it arrives
         print("Gemini's final response:")
-        print(f"  {final_response.text}\n")
+        print("  ", end="")
+        async for chunk in await client.aio.models.generate_content_stream(
+            model="gemini-2.5-flash",
+            contents=contents,
+            config=weather_config
+        ):
+            if chunk.text:
+                print(chunk.text, end="", flush=True)
+        print("\n")
     else:
         # If no function call was needed, just show the direct response
         print("No function call needed. Direct response:")
         print(f"  {response.text}\n")
 
 
-if __name__ == "__main__":
+async def demo_batch_function_calling(user_queries: list[str]):
+    """
+    Sends all queries to Gemini as a single Batch API job instead of one request each.
+    Batch jobs are scheduled asynchronously at a lower cost, so this suits latency-tolerant runs.
+    """
+    print(f"\n{'='*60}")
+    print(f"Batch job with {len(user_queries)} queries")
+    print(f"{'='*60}\n")
+
+    # Step 4 (batch): Build one JSONL line per query, each carrying the weather tool
+    tool_dict = weather_tool.model_dump(mode="json", exclude_none=True)
+    jsonl = "\n".join(
+        json.dumps({
+            "key": f"req_{i}",
+            "request": {
+                "contents": [{"role": "user", "parts": [{"text": user_query}]}],
+                "tools": [tool_dict]
+            }
+        })
+        for i, user_query in enumerate(user_queries)
+    )
+
+    uploaded_file = await client.aio.files.upload(
+        file=io.BytesIO(jsonl.encode("utf-8")),
+        config=types.UploadFileConfig(display_name="weather-batch-requests", mime_type="jsonl")
+    )
+    batch_job = await client.aio.batches.create(
+        model="gemini-2.5-flash",
+        src=uploaded_file.name,
+        config={"display_name": "weather-batch-job"}
+    )
+    print(f"Created batch job: {batch_job.name}")
+
+    # Poll until the job reaches a final state
+    completed_states = {
+        "JOB_STATE_SUCCEEDED",
+        "JOB_STATE_FAILED",
+        "JOB_STATE_CANCELLED",
+        "JOB_STATE_EXPIRED",
+    }
+    while batch_job.state.name not in completed_states:
+        print(f"  Job state: {batch_job.state.name}, waiting...")
+        await asyncio.sleep(10)
+        batch_job = await client.aio.batches.get(name=batch_job.name)
+
+    if batch_job.state.name != "JOB_STATE_SUCCEEDED":
+        print(f"Batch job finished with state {batch_job.state.name}: {batch_job.error}\n")
+        return
+
+    # Step 5 (batch): Download the results and execute any requested function calls locally
+    result_bytes = await client.aio.files.download(file=batch_job.dest.file_name)
+    for line in result_bytes.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        user_query = user_queries[int(result["key"].removeprefix("req_"))]
+        print(f"\nUser Query: {user_query}")
+
+        if "error" in result:
+            print(f"  Request failed: {result['error']}\n")
+            continue
+
+        # A result may have no candidates or no content (e.g. blocked), so don't index into it
+        response = types.GenerateContentResponse.model_validate(result["response"])
+        function_calls = response.function_calls or []
+
+        if function_calls:
+            # Execute the calls concurrently, the same way demo_function_calling does
+            function_args = [dict(function_call.args) for function_call in function_calls]
+            weather_results = await asyncio.gather(
+                *(
+                    execute_function_call(function_call.name, args)
+                    for function_call, args in zip(function_calls, function_args)
+                )
+            )
+
+            for i, (function_call, args, weather_result) in enumerate(
+                zip(function_calls, function_args, weather_results), 1
+            ):
+                print(f"  [{i}] Function: {function_call.name}")
+                print(f"      Arguments: {args}")
+
+                if weather_result is not None:
+                    print(f"      Result: {json.dumps(weather_result)}")
+            print()
+        elif response.text:
+            print("  No function call needed. Direct response:")
+            print(f"  {response.text}\n")
+        else:
+            print("  No content in response.\n")
+
+
+async def main(interactive: bool = False):
     # Run several demo queries
     print("\n" + "="*60)
     print("GEMINI FUNCTION CALLING DEMO")
     print("="*60)
 
-    # Example 1: Simple weather query
-    demo_function_calling("What's the weather like in Tokyo?")
-
-    # Example 2: Weather with specific unit
-    demo_function_calling("Can you tell me the temperature in New York in Fahrenheit?")
+    user_queries = [
+        # Example 1: Simple weather query
+        "What's the weather like in Tokyo?",
+        # Example 2: Weather with specific unit
+        "Can you tell me the temperature in New York in Fahrenheit?",
+        # Example 3: Multiple locations
+        "London, Paris or Tokyo, where is the warmest?",
+    ]
 
-    # Example 3: Multiple locations
-    demo_function_calling("London, Paris or Tokyo, where is the warmest?")
+    if interactive:
+        # Pipeline the queries: once a query's first response lands, send the next query
+        # so its request is in flight while this one executes functions and prints
+        next_request = asyncio.create_task(send_initial_request(user_queries[0]))
+        for i, user_query in enumerate(user_queries):
+            initial_request = await next_request
+            if i + 1 < len(user_queries):
+                next_request = asyncio.create_task(send_initial_request(user_queries[i + 1]))
+            await demo_function_calling(user_query, initial_request)
+    else:
+        await demo_batch_function_calling(user_queries)
 
     print("\n" + "="*60)
     print("DEMO COMPLETE")
     print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--interactive",
+        action="store_true",
+        help="send each query directly instead of submitting one Batch API job"
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="log this demo's debug output: function calls made and contents sent with the final request"
+    )
+    cli_args = parser.parse_args()
+    # Keep library loggers (httpx, google_genai, ...) at the default WARNING level; --debug only affects this demo
+    logging.basicConfig()
+    if cli_args.debug:
+        logger.setLevel(logging.DEBUG)
+    asyncio.run(main(interactive=cli_args.interactive))
@@ -3,14 +3,24 @@ Weather MCP Server Demo
 一个简单的 MCP Server 示例，用于演示 MCP (Model Context Protocol) 的基本概念
 
 使用方法：
-1. 安装依赖: pip install mcp
+1. 安装依赖: pip install mcp numpy
 2. 配置 Claude Desktop (详见 MCP_README.md)
 3. 重启 Claude Desktop
 4. 在对话中询问天气相关问题
 """
 
+import asyncio
+import functools
+import logging
+from typing import NamedTuple
+
+import numpy as np
 from mcp.server.fastmcp import FastMCP
 
+# 工具调用日志使用惰性格式化，只有开启 DEBUG 级别时才会生成日志字符串
+# stdio 传输占用 stdout，调试时请将日志写入文件（详见 MCP_README.md）
+logger = logging.getLogger(__name__)
+
 # 创建 MCP Server 实例
 # "weather" 是这个 server 的名称，会显示在 Claude Desktop 中
 mcp = FastMCP("weather")
@@ -26,9 +36,69 @@ WEATHER_DATABASE = {
     "Sydney": {"temperature": 20, "condition": "Clear", "humidity": 55},
 }
 
+# 城市不存在时使用的默认天气
+DEFAULT_WEATHER = {"temperature": 20, "condition": "Unknown", "humidity": 50}
+
+# 按列存储的摄氏温度，最后一行对应 DEFAULT_WEATHER，用于启动时批量换算华氏度
+TEMPERATURES_C = np.array(
+    [weather["temperature"] for weather in WEATHER_DATABASE.values()] + [DEFAULT_WEATHER["temperature"]],
+    dtype=np.int16
+)
+
+# 启动时对整列温度做一次向量化的华氏度换算，查询时无需再做温度换算
+TEMPERATURES_F = np.round(TEMPERATURES_C * 1.8 + 32, 1)
+WEATHER_DATABASE_F = {
+    city: {**weather, "temperature": temperature_f}
+    for (city, weather), temperature_f in zip(WEATHER_DATABASE.items(), TEMPERATURES_F.tolist())
+}
+DEFAULT_WEATHER_F = {**DEFAULT_WEATHER, "temperature": TEMPERATURES_F[-1].item()}
+
+# 温度单位名称（小写）到单位符号的映射，未知单位按摄氏度处理
+UNIT_SYMBOLS = {"celsius": "C", "c": "C", "fahrenheit": "F", "f": "F"}
+
+
+class WeatherReading(NamedTuple):
+    """单个城市的天气查询结果（不可变，可安全缓存和共享）"""
+    location: str
+    temperature: float
+    unit: str
+    condition: str
+    humidity: int
+
+
+@functools.lru_cache(maxsize=64)
+def lookup_weather(location: str, unit_symbol: str = "C") -> WeatherReading:
+    """
+    查询天气并缓存结果，相同的 (location, unit_symbol) 直接返回缓存的 WeatherReading
+
+    unit_symbol 为 "C" 或 "F"，由调用方通过 UNIT_SYMBOLS 归一化
+    """
+    # 按单位选择数据表，如果城市不存在则返回默认值
+    if unit_symbol == "F":
+        weather = WEATHER_DATABASE_F.get(location, DEFAULT_WEATHER_F)
+    else:
+        weather = WEATHER_DATABASE.get(location, DEFAULT_WEATHER)
+
+    return WeatherReading(
+        location=location,
+        temperature=weather["temperature"],
+        unit=unit_symbol,
+        condition=weather["condition"],
+        humidity=weather["humidity"]
+    )
+
+
+async def fetch_weather(location: str, unit_symbol: str = "C") -> WeatherReading:
+    """
+    异步获取单个城市的天气，供 get_weather 和 compare_weather 调用
+
+    接入真实天气 API 时在这里发起异步 HTTP 请求；目前直接返回本地缓存的数据
+    """
+    return lookup_weather(location, unit_symbol)
+
 
 @mcp.tool()
-def get_weather(location: str, unit: str = "celsius") -> dict:
+async def get_weather(location: str, unit: str = "celsius") -> dict:
     """
     获取指定城市的当前天气信息
 
@@ -39,32 +109,13 @@ def get_weather(location: str, unit: str = "celsius") -> dict:
     Returns:
         包含天气信息的字典：location, temperature, unit, condition, humidity
     """
-    # 获取天气数据，如果城市不存在则返回默认值
-    weather = WEATHER_DATABASE.get(
-        location,
-        {"temperature": 20, "condition": "Unknown", "humidity": 50}
-    )
-
-    temperature = weather["temperature"]
-
-    # 根据单位转换温度
-    if unit.lower() == "fahrenheit":
-        temperature = round(temperature * 9/5 + 32, 1)
-        unit_symbol = "F"
-    else:
-        unit_symbol = "C"
-
-    return {
-        "location": location,
-        "temperature": temperature,
-        "unit": unit_symbol,
-        "condition": weather["condition"],
-        "humidity": weather["humidity"]
-    }
+    logger.debug("tool=%s location=%s unit=%s", "get_weather", location, unit)
+    weather = await fetch_weather(location, UNIT_SYMBOLS.get(unit.casefold(), "C"))
+    return weather._asdict()
 
 
 @mcp.tool()
-def compare_weather(locations: list[str], unit: str = "celsius") -> dict:
+async def compare_weather(locations: list[str], unit: str = "celsius") -> dict:
     """
     比较多个城市的天气，找出最热、最冷、最潮湿的城市
 
@@ -75,49 +126,59 @@ def compare_weather(locations: list[str], unit: str = "celsius") -> dict:
     Returns:
         包含各城市天气信息和比较结果的字典
     """
-    results = []
+    logger.debug("tool=%s locations=%s unit=%s", "compare_weather", locations, unit)
+    unit_symbol = UNIT_SYMBOLS.get(unit.casefold(), "C")
 
-    for location in locations:
-        weather = get_weather(location, unit)
-        results.append(weather)
+    # 并发获取所有城市的天气，结果顺序与 locations 一致
+    results = await asyncio.gather(
+        *(fetch_weather(location, unit_symbol) for location in locations)
+    )
 
     if not results:
         return {"error": "No locations provided"}
 
-    # 找出最热、最冷、最潮湿的城市
-    warmest = max(results, key=lambda x: x["temperature"])
-    coldest = min(results, key=lambda x: x["temperature"])
-    most_humid = max(results, key=lambda x: x["humidity"])
+    # 基于刚获取的天气结果构建列数组，找出最热、最冷、最潮湿的城市
+    # 所有结果单位相同，并列时取第一个城市
+    temperatures = np.fromiter(
+        (weather.temperature for weather in results), dtype=float, count=len(results)
+    )
+    humidities = np.fromiter(
+        (weather.humidity for weather in results), dtype=float, count=len(results)
+    )
+    warmest = results[temperatures.argmax()]
+    coldest = results[temperatures.argmin()]
+    most_humid = results[humidities.argmax()]
 
     return {
-        "weather_data": results,
+        "weather_data": [weather._asdict() for weather in results],
         "comparison": {
             "warmest": {
-                "location": warmest["location"],
-                "temperature": warmest["temperature"],
-                "unit": warmest["unit"]
+                "location": warmest.location,
+                "temperature": warmest.temperature,
+                "unit": warmest.unit
             },
             "coldest": {
-                "location": coldest["location"],
-                "temperature": coldest["temperature"],
-                "unit": coldest["unit"]
+                "location": coldest.location,
+                "temperature": coldest.temperature,
+                "unit": coldest.unit
             },
             "most_humid": {
-                "location": most_humid["location"],
-                "humidity": most_humid["humidity"]
+                "location": most_humid.location,
+                "humidity": most_humid.humidity
             }
         }
     }
 
 
 @mcp.tool()
-def list_available_cities() -> list[str]:
+async def list_available_cities() -> list[str]:
     """
     列出所有支持查询天气的城市
 
     Returns:
         支持的城市名称列表
     """
+    logger.debug("tool=%s", "list_available_cities")
     return list(WEATHER_DATABASE.keys())
 
 